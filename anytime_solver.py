@@ -0,0 +1,177 @@
+import math
+import time
+
+import numpy as np
+
+from inventory_optimizer import thread_workspace
+from presolve import presolve, presolved_step_into, required_inventory
+from utils import calculate_cost_breakdown
+
+
+def silver_meal_plan(demand, max_order, max_storage, setup_cost, holding_cost, holding_weights=None):
+    """Capacity-aware Silver-Meal heuristic; returns order quantities per step or None if infeasible.
+
+    holding_weights gives how many months each step spans, as produced by compress_zero_demand or presolve.
+    """
+    n = len(demand)
+    weights = holding_weights or [1] * n
+    required = required_inventory(demand, max_order)
+    plan = []
+    inventory = 0
+    for t in range(n):
+        need = max(0, demand[t] + required[t + 1] - inventory)
+        limit = min(max_order, max_storage + demand[t] - inventory)
+        if need > limit:
+            return None
+
+        ordered = need
+        if need > 0:
+            # Extend coverage while the average cost per covered month keeps falling
+            covered, cost, months_held, months_covered = demand[t], setup_cost, 0, weights[t]
+            best_average = cost / months_covered
+            for k in range(t + 1, n):
+                months_held += weights[k - 1]
+                extra_cost = holding_cost * months_held * demand[k]
+                quantity = covered + demand[k] - inventory
+                if quantity > limit or (cost + extra_cost) / (months_covered + weights[k]) > best_average:
+                    break
+                covered += demand[k]
+                cost += extra_cost
+                months_covered += weights[k]
+                best_average = cost / months_covered
+            ordered = max(need, min(limit, covered - inventory))
+
+        plan.append(ordered)
+        inventory = inventory + ordered - demand[t]
+    return plan
+
+
+class AnytimeSolver:
+    """Time-budgeted exact DP that always holds a feasible best-so-far plan.
+
+    A heuristic plan is available immediately; each call to solve() advances the
+    backward DP until the deadline, tightening the lower bound and trying to
+    improve the incumbent by switching to the exact policy for the solved tail.
+    The problem is presolved first, so infeasible inputs are reported immediately and
+    each DP step only evaluates its bounded inventory range.
+    """
+
+    def __init__(self, n, demand, max_order, max_storage, production_cost, setup_cost, holding_cost):
+        self.n = n
+        self.demand = list(demand)
+        self.max_order = max_order
+        self.max_storage = max_storage
+        self.production_cost = production_cost
+        self.setup_cost = setup_cost
+        self.holding_cost = holding_cost
+
+        self.problem = presolve(n, self.demand, max_order, max_storage)
+        self.step_demand = self.problem.step_demand
+        self.holding_weights = self.problem.holding_weights
+        self.steps = self.problem.steps if self.problem.feasible else 0
+
+        # Backward DP state: cost-to-go of the first unsolved step and per-step order tables.
+        # An infeasible problem keeps the user's max_storage, so it gets no real DP state.
+        self.next_step = self.steps
+        self.cost_to_go = np.zeros(self.problem.max_storage + 1 if self.problem.feasible else 1)
+        self.optimal_order = [None] * self.steps
+
+        self.incumbent = None
+        if self.problem.feasible:
+            self.incumbent = silver_meal_plan(self.step_demand, self.problem.max_order, self.problem.max_storage,
+                                              setup_cost, holding_cost, self.holding_weights)
+        self.incumbent_cost = self._plan_cost(self.incumbent)
+
+    def _plan_cost(self, step_orders):
+        if step_orders is None:
+            return math.inf
+        return calculate_cost_breakdown(self.problem.expand(step_orders), self.demand,
+                                        self.production_cost, self.setup_cost, self.holding_cost)['total']
+
+    @property
+    def progress(self):
+        return (self.steps - self.next_step) / self.steps if self.steps else 1.0
+
+    @property
+    def finished(self):
+        return self.next_step == 0
+
+    def lower_bound(self):
+        """Exact cost of the solved tail plus a production/setup relaxation of the unsolved head"""
+        if not self.problem.feasible:
+            return math.inf
+        if self.finished:
+            return float(self.cost_to_go[0])
+        head_demand = sum(self.step_demand[:self.next_step])
+        head_end = self.problem.periods[self.next_step] if self.next_step < self.steps else self.n
+        forced = sum(1 for t in self.problem.forced_setups if t < head_end)
+        head_setups = max(math.ceil(head_demand / self.problem.max_order), forced)
+        stock = np.arange(self.problem.max_storage + 1)
+        tail = np.min(self.production_cost * stock + self.cost_to_go)
+        return float(self.production_cost * head_demand + self.setup_cost * head_setups + tail)
+
+    def _trace_steps(self, start, inventory):
+        step_orders = []
+        for t in range(start, self.steps):
+            ordered = int(self.optimal_order[t][inventory])
+            step_orders.append(ordered)
+            inventory = inventory + ordered - self.step_demand[t]
+        return step_orders
+
+    def _improve_incumbent(self):
+        """Follow the incumbent through the unsolved head, then the exact policy for the tail"""
+        if self.incumbent is None or self.finished:
+            return
+        t = self.next_step
+        inventory = sum(self.incumbent[:t]) - sum(self.step_demand[:t])
+        if np.isinf(self.cost_to_go[inventory]):
+            return
+        candidate = self.incumbent[:t] + self._trace_steps(t, inventory)
+        candidate_cost = self._plan_cost(candidate)
+        if candidate_cost < self.incumbent_cost:
+            self.incumbent, self.incumbent_cost = candidate, candidate_cost
+
+    def solve(self, time_budget):
+        """Advance the DP for up to time_budget seconds and return the current result"""
+        deadline = time.monotonic() + time_budget
+        if not self.finished:
+            workspace = thread_workspace()
+            workspace.reserve(0, self.problem.max_storage, self.problem.max_order)
+            size = self.problem.max_storage + 1
+        # Always solve at least one step so repeated calls keep making progress
+        while not self.finished:
+            t = self.next_step - 1
+            cost, order = np.empty(size), np.empty(size, dtype=np.int64)
+            presolved_step_into(self.problem, workspace, t, self.cost_to_go, self.production_cost, self.setup_cost,
+                                self.holding_cost, cost, order)
+            self.cost_to_go, self.optimal_order[t] = cost, order
+            self.next_step = t
+            if time.monotonic() >= deadline:
+                break
+
+        if self.finished:
+            if self.problem.feasible and not np.isinf(self.cost_to_go[0]):
+                self.incumbent = self._trace_steps(0, 0)
+                self.incumbent_cost = self._plan_cost(self.incumbent)
+        else:
+            self._improve_incumbent()
+        return self.result()
+
+    def result(self):
+        lower_bound = self.lower_bound()
+        if self.incumbent is None:
+            gap = math.inf
+        elif self.incumbent_cost > 0:
+            gap = max(0.0, (self.incumbent_cost - lower_bound) / self.incumbent_cost)
+        else:
+            gap = 0.0
+        return {
+            'optimal_sol': None if self.incumbent is None else self.problem.expand(self.incumbent),
+            'cost': self.incumbent_cost,
+            'lower_bound': lower_bound,
+            'gap': gap,
+            'optimal': self.finished,
+            'progress': self.progress,
+            'diagnostic': self.problem.diagnostic,
+            'presolve': self.problem.report()
+        }
@@ -4,10 +4,13 @@ import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 import numpy as np
+import os
 
 # Import your backend classes (keep original logic intact)
-from inventory_optimizer import InventoryOptimizer, EOQCalculator
+from inventory_optimizer import EOQCalculator
+from anytime_solver import AnytimeSolver
 from utils import *
+from result_store import ResultStore
 
 def main():
     st.set_page_config(
@@ -89,6 +92,9 @@ def main():
     
     # Input Section
     render_input_section()
+    
+    # Stored batch runs
+    render_result_store_browser()
 
 def render_input_section():
     """Render the main input section"""
@@ -118,6 +124,9 @@ def render_input_section():
     with col4:
         max_storage = st.number_input("Maximum Storage Capacity", min_value=1, value=300, help="Maximum units that can be stored")
     
+    time_budget = st.slider("Solve Time Budget (seconds)", min_value=0.5, max_value=30.0, value=5.0, step=0.5,
+                            help="Return the best plan found so far when the exact solve takes longer")
+    
     # Demand Input Section
     st.markdown("#### 📈 Monthly Demand Forecast")
     
@@ -137,11 +146,63 @@ def render_input_section():
     
     # Calculate button
     if st.button("🚀 Calculate Optimal Solution", type="primary"):
-        if demand and all(d > 0 for d in demand):
+        if demand and all(d >= 0 for d in demand) and sum(demand) > 0:
             calculate_and_display_results(n, demand, max_order, max_storage, 
-                                        production_cost, setup_cost, holding_cost)
+                                        production_cost, setup_cost, holding_cost, time_budget)
+        else:
+            st.error("Please ensure demand values are not negative and at least one month has demand")
+    elif 'anytime_solver' in st.session_state:
+        # A plan solved for different inputs no longer applies
+        if st.session_state.get('anytime_inputs') == solver_inputs(n, demand, max_order, max_storage, production_cost,
+                                                                  setup_cost, holding_cost):
+            render_anytime_results(time_budget)
         else:
-            st.error("Please ensure all demand values are greater than 0")
+            for key in ('anytime_solver', 'anytime_result', 'anytime_inputs', 'plan_accepted'):
+                st.session_state.pop(key, None)
+
+def solver_inputs(n, demand, max_order, max_storage, production_cost, setup_cost, holding_cost):
+    """Snapshot of the inputs a solver was built from"""
+    return (n, tuple(demand or ()), max_order, max_storage, production_cost, setup_cost, holding_cost)
+
+def render_result_store_browser():
+    """Page through a stored batch run without loading it into memory"""
+    with st.expander("📂 Browse Batch Results"):
+        store_path = st.text_input("Result store directory", value="", help="Directory written by ResultStore")
+        if not store_path:
+            return
+        if not os.path.isdir(store_path):
+            st.error("Result store directory not found")
+            return
+        
+        try:
+            store = ResultStore(store_path, read_only=True)
+        except ValueError as e:
+            st.error(str(e))
+            return
+        total_rows = len(store)
+        st.metric("Stored SKUs", f"{total_rows:,}")
+        if total_rows == 0:
+            return
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            page_size = st.selectbox("Rows per page", [25, 50, 100, 500], index=1)
+        with col2:
+            page_count = (total_rows + page_size - 1) // page_size
+            page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1)
+        
+        start = (page_number - 1) * page_size
+        st.dataframe(pd.DataFrame(store.page(start, page_size)), use_container_width=True)
+        
+        row = st.number_input("Show plan for row", min_value=start, max_value=min(start + page_size, total_rows) - 1, value=start)
+        plan = store.plan(row)
+        st.markdown(f"**Plan for {plan['sku']}**")
+        st.dataframe(pd.DataFrame({
+            'Month': np.arange(1, len(plan['order']) + 1),
+            'Order Quantity': plan['order'],
+            'Inventory (After Demand)': plan['inventory'],
+            'Monthly Cost': plan['period_cost']
+        }), use_container_width=True)
 
 def render_manual_demand_input(n):
     """Render manual demand input with improved layout"""
@@ -176,6 +237,15 @@ def render_pattern_demand_input(n):
         elif pattern_type == "Random":
             max_variation = st.number_input("Max Variation (%)", min_value=0, value=20)
     
+    # Random demand is drawn once per setting so reruns (e.g. Accept/Refine) keep the same series
+    if pattern_type == "Random":
+        random_key = (n, base_demand, max_variation)
+        if st.session_state.get('random_demand_key') != random_key:
+            variation_factors = np.random.uniform(-max_variation/100, max_variation/100, size=n)
+            st.session_state['random_demand'] = [int(base_demand * (1 + factor)) for factor in variation_factors]
+            st.session_state['random_demand_key'] = random_key
+        return list(st.session_state['random_demand'])
+    
     # Generate demand based on pattern
     demand = []
     for i in range(n):
@@ -188,9 +258,6 @@ def render_pattern_demand_input(n):
         elif pattern_type == "Seasonal":
             seasonal_factor = amplitude * np.sin(2 * np.pi * i / 12)
             demand.append(int(base_demand + seasonal_factor))
-        elif pattern_type == "Random":
-            variation_factor = np.random.uniform(-max_variation/100, max_variation/100)
-            demand.append(int(base_demand * (1 + variation_factor)))
     
     return demand
 
@@ -227,8 +294,8 @@ def render_demand_summary(demand):
     )
     st.plotly_chart(fig, use_container_width=True)
 
-def calculate_and_display_results(n, demand, max_order, max_storage, production_cost, setup_cost, holding_cost):
-    """Calculate and display results using your original backend logic"""
+def calculate_and_display_results(n, demand, max_order, max_storage, production_cost, setup_cost, holding_cost, time_budget):
+    """Start a time-budgeted solve and display the best plan found"""
     
     # Validate inputs
     errors = validate_inputs(n, demand, max_order, max_storage, production_cost, setup_cost, holding_cost)
@@ -238,18 +305,60 @@ def calculate_and_display_results(n, demand, max_order, max_storage, production_
             st.error(error)
         return
     
-    # Use your original backend logic
-    inventory_optimizer = InventoryOptimizer()
-    eoq_calculator = EOQCalculator(n, demand, production_cost, setup_cost, holding_cost)
+    # Keep the solver in the session so the user can resume refining after the deadline
+    solver = AnytimeSolver(n, demand, max_order, max_storage, production_cost, setup_cost, holding_cost)
+    st.session_state['anytime_solver'] = solver
+    st.session_state['anytime_inputs'] = solver_inputs(n, demand, max_order, max_storage, production_cost,
+                                                       setup_cost, holding_cost)
+    st.session_state['anytime_result'] = solver.solve(time_budget)
+    st.session_state['plan_accepted'] = False
+    
+    render_anytime_results(time_budget)
+
+def render_anytime_results(time_budget):
+    """Show solve progress, let the user accept or refine, then display the current plan"""
+    solver = st.session_state['anytime_solver']
+    result = st.session_state['anytime_result']
+    
+    if result['diagnostic']:
+        st.error(f"❌ No feasible plan: {result['diagnostic']}")
+        return
+    
+    presolve_report = result['presolve']
+    st.caption(f"🧹 Presolve: {presolve_report['months']} months → {presolve_report['steps']} DP steps, "
+               f"{presolve_report['dp_states'][0]:,} → {presolve_report['dp_states'][1]:,} inventory states, "
+               f"{presolve_report['forced_setups']} forced orders")
+    
+    if not result['optimal'] and not st.session_state['plan_accepted']:
+        st.progress(result['progress'], text=f"Exact solve {result['progress']:.0%} complete")
+        if result['optimal_sol'] is not None:
+            st.info(f"⏱️ Time budget reached. Best plan so far costs ${result['cost']:.2f}, "
+                    f"at most {result['gap']:.1%} above the lower bound of ${result['lower_bound']:.2f}")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            accept = st.button("✅ Accept Current Plan")
+        with col2:
+            refine = st.button("🔄 Keep Refining")
+        
+        if refine:
+            st.session_state['anytime_result'] = solver.solve(time_budget)
+            st.rerun()
+        if accept:
+            st.session_state['plan_accepted'] = True
+            st.rerun()
+    
+    if result['optimal_sol'] is None:
+        if result['optimal']:
+            st.error("No feasible plan meets demand within the order and storage capacities")
+        return
     
-    # Calculate optimal solution
-    optimal_order = inventory_optimizer.calculate_min_cost(n, demand, max_order, max_storage, 
-                                                         production_cost, setup_cost, holding_cost)
-    optimal_sol = inventory_optimizer.calculate_optimal_sol(n, optimal_order, demand)
+    eoq_calculator = EOQCalculator(solver.n, solver.demand, solver.production_cost, solver.setup_cost, solver.holding_cost)
     eoq = eoq_calculator.calculate_eoq()
     
     # Display results
-    display_enhanced_results(n, optimal_sol, demand, eoq, production_cost, setup_cost, holding_cost)
+    display_enhanced_results(solver.n, result['optimal_sol'], solver.demand, eoq,
+                             solver.production_cost, solver.setup_cost, solver.holding_cost)
 
 def display_enhanced_results(n, optimal_sol, demand, eoq, production_cost, setup_cost, holding_cost):
     """Enhanced results display with modern UI"""
@@ -0,0 +1,384 @@
+"""Sharded batch runner: a coordinator splits SKUs into shards handed to workers through a filesystem queue.
+
+Run directory layout (share it over NFS or similar to add workers on other hosts):
+
+    manifest.json        shard list and completion state, written only by the coordinator
+    shards/<id>.jsonl    [input line number, record text] for each SKU in the shard
+    queue/pending/<id>   shards waiting for a worker
+    queue/claimed/<id>@<worker>
+                         shards being solved; requeued if the worker's heartbeat goes stale
+    heartbeats/<worker>  touched periodically by each live worker
+    workers/<worker>.json
+                         per-worker busy time and counts, for utilization reporting
+    results/<id>/        ResultStore per finished shard, renamed into place atomically
+    store/               merged ResultStore once every shard is done
+
+Input is JSON lines with sku, demand, max_order, max_storage, production_cost, setup_cost and holding_cost.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from inventory_optimizer import thread_workspace
+from presolve import presolve, solve_presolved
+from result_store import ResultStore, solution_row
+from utils import validate_inputs
+
+HEARTBEAT_INTERVAL = 2.0
+HEARTBEAT_TIMEOUT = 30.0
+POLL_INTERVAL = 0.5
+
+
+def _write_json(path, data):
+    """Write JSON atomically so readers never see a partial file"""
+    tmp_path = '{}.tmp-{}'.format(path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+class RunDirectory:
+    def __init__(self, path):
+        # Absolute, so workers started from another directory find the same run
+        self.path = os.path.abspath(path)
+        self.manifest_path = os.path.join(self.path, 'manifest.json')
+        self.shards = os.path.join(self.path, 'shards')
+        self.pending = os.path.join(self.path, 'queue', 'pending')
+        self.claimed = os.path.join(self.path, 'queue', 'claimed')
+        self.heartbeats = os.path.join(self.path, 'heartbeats')
+        self.workers = os.path.join(self.path, 'workers')
+        self.results = os.path.join(self.path, 'results')
+        self.store = os.path.join(self.path, 'store')
+
+    def create_dirs(self):
+        for path in (self.shards, self.pending, self.claimed, self.heartbeats, self.workers, self.results):
+            os.makedirs(path, exist_ok=True)
+
+    def shard_done(self, shard_id):
+        return os.path.isdir(os.path.join(self.results, shard_id))
+
+    def claimed_shards(self):
+        """Return (shard_id, worker_id, filename) for every claimed shard"""
+        claims = []
+        for name in os.listdir(self.claimed):
+            shard_id, _, worker_id = name.partition('@')
+            claims.append((shard_id, worker_id, name))
+        return claims
+
+
+def solve_sku(record, workspace):
+    """Solve one SKU record and return a ResultStore row"""
+    demand = record['demand']
+    errors = validate_inputs(len(demand), demand, record['max_order'], record['max_storage'],
+                             record['production_cost'], record['setup_cost'], record['holding_cost'])
+    if errors:
+        raise ValueError("; ".join(errors))
+    problem = presolve(len(demand), demand, record['max_order'], record['max_storage'])
+    optimal_sol, _ = solve_presolved(problem, record['production_cost'], record['setup_cost'],
+                                     record['holding_cost'], workspace)
+    return solution_row(record['sku'], optimal_sol, demand, record['production_cost'],
+                        record['setup_cost'], record['holding_cost'])
+
+
+class Worker:
+    def __init__(self, run_dir, worker_id=None):
+        self.run_dir = RunDirectory(run_dir)
+        self.worker_id = worker_id or '{}-{}'.format(socket.gethostname(), os.getpid())
+        self.heartbeat_path = os.path.join(self.run_dir.heartbeats, self.worker_id)
+        self.stats = {'started': time.time(), 'updated': time.time(), 'busy': 0.0, 'shards': 0, 'skus': 0, 'failed': 0}
+        self._stop = threading.Event()
+
+    def _heartbeat(self):
+        while not self._stop.is_set():
+            with open(self.heartbeat_path, 'a'):
+                os.utime(self.heartbeat_path)
+            self._stop.wait(HEARTBEAT_INTERVAL)
+
+    def _claim(self):
+        """Atomically move one pending shard into claimed/; returns its shard id or None"""
+        for shard_id in sorted(os.listdir(self.run_dir.pending)):
+            target = os.path.join(self.run_dir.claimed, '{}@{}'.format(shard_id, self.worker_id))
+            try:
+                os.rename(os.path.join(self.run_dir.pending, shard_id), target)
+            except FileNotFoundError:
+                continue  # another worker claimed it first
+            return shard_id
+        return None
+
+    def _process(self, shard_id):
+        workspace = thread_workspace()
+        rows, errors = [], []
+        with open(os.path.join(self.run_dir.shards, shard_id + '.jsonl')) as f:
+            for shard_line in f:
+                line_number, line = json.loads(shard_line)
+                # A bad record is reported in errors.json instead of failing the whole shard
+                sku = None
+                try:
+                    record = json.loads(line)
+                    if isinstance(record, dict):
+                        sku = record.get('sku')
+                    rows.append(solve_sku(record, workspace))
+                except KeyError as e:
+                    errors.append({'sku': sku, 'shard': shard_id, 'line': line_number,
+                                   'error': 'Missing field {}'.format(e)})
+                except (TypeError, json.JSONDecodeError, ValueError) as e:
+                    errors.append({'sku': sku, 'shard': shard_id, 'line': line_number, 'error': str(e)})
+
+        # Build the shard's store privately, then publish it with one rename
+        tmp_path = os.path.join(self.run_dir.results, '.{}.{}'.format(shard_id, self.worker_id))
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        store = ResultStore(tmp_path)
+        store.append_batch(rows)
+        _write_json(os.path.join(tmp_path, 'errors.json'), errors)
+        try:
+            os.rename(tmp_path, os.path.join(self.run_dir.results, shard_id))
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)  # a requeued copy already finished it
+        claim = os.path.join(self.run_dir.claimed, '{}@{}'.format(shard_id, self.worker_id))
+        if os.path.exists(claim):
+            os.remove(claim)
+        return len(rows), len(errors)
+
+    def _run_finished(self):
+        shard_ids = _read_json(self.run_dir.manifest_path)['shards']
+        return all(self.run_dir.shard_done(shard_id) for shard_id in shard_ids)
+
+    def run(self):
+        """Solve shards until every shard in the run is done"""
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+        stats_path = os.path.join(self.run_dir.workers, self.worker_id + '.json')
+        try:
+            while True:
+                shard_id = self._claim()
+                if shard_id is None:
+                    # Stay around while other workers hold shards that may yet be requeued
+                    if self._run_finished():
+                        break
+                    time.sleep(POLL_INTERVAL)
+                    continue
+                started = time.time()
+                solved, failed = self._process(shard_id)
+                self.stats['busy'] += time.time() - started
+                self.stats['shards'] += 1
+                self.stats['skus'] += solved
+                self.stats['failed'] += failed
+                self.stats['updated'] = time.time()
+                _write_json(stats_path, self.stats)
+        finally:
+            self._stop.set()
+            self.stats['updated'] = time.time()
+            _write_json(stats_path, self.stats)
+            if os.path.exists(self.heartbeat_path):
+                os.remove(self.heartbeat_path)
+
+
+class Coordinator:
+    def __init__(self, run_dir, workers=4, heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        self.run_dir = RunDirectory(run_dir)
+        self.workers = workers
+        self.heartbeat_timeout = heartbeat_timeout
+        self.processes = []
+        self.worker_failures = 0
+
+    def prepare(self, input_path, shard_size):
+        """Split the input into shards, or resume the manifest of an earlier run"""
+        self.run_dir.create_dirs()
+        if os.path.exists(self.run_dir.manifest_path):
+            manifest = _read_json(self.run_dir.manifest_path)
+        else:
+            manifest = {'input': os.path.abspath(input_path), 'shard_size': shard_size, 'shards': {}}
+            with open(input_path) as f:
+                shard, count = None, 0
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    if count % shard_size == 0:
+                        if shard:
+                            shard.close()
+                        shard_id = 'shard-{:06d}'.format(count // shard_size)
+                        shard = open(os.path.join(self.run_dir.shards, shard_id + '.jsonl'), 'w')
+                        manifest['shards'][shard_id] = {'status': 'pending', 'skus': 0}
+                    # Keep the input line number so errors can be traced back to the input file
+                    shard.write(json.dumps([line_number, line.rstrip('\n')]) + '\n')
+                    manifest['shards'][shard_id]['skus'] += 1
+                    count += 1
+                if shard:
+                    shard.close()
+            _write_json(self.run_dir.manifest_path, manifest)
+
+        # Queue every shard that is neither finished nor held by a live worker
+        queued = set(os.listdir(self.run_dir.pending))
+        claimed = {shard_id for shard_id, _, _ in self.run_dir.claimed_shards()}
+        for shard_id in manifest['shards']:
+            if not self.run_dir.shard_done(shard_id) and shard_id not in queued and shard_id not in claimed:
+                open(os.path.join(self.run_dir.pending, shard_id), 'w').close()
+        self.manifest = manifest
+
+    def _worker_alive(self, worker_id):
+        """Local workers are checked by pid, remote ones by heartbeat age"""
+        host, _, pid = worker_id.rpartition('-')
+        if host == socket.gethostname() and pid.isdigit():
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                return False
+            except PermissionError:
+                pass  # the process exists but belongs to another user
+            # Its heartbeat file may not exist yet, so a live pid is enough
+            return True
+        heartbeat = os.path.join(self.run_dir.heartbeats, worker_id)
+        if not os.path.exists(heartbeat):
+            return False
+        return time.time() - os.path.getmtime(heartbeat) < self.heartbeat_timeout
+
+    def _requeue_dead(self):
+        """Return claimed shards of dead workers to the pending queue"""
+        requeued = 0
+        for shard_id, worker_id, name in self.run_dir.claimed_shards():
+            if self.run_dir.shard_done(shard_id) or not self._worker_alive(worker_id):
+                source = os.path.join(self.run_dir.claimed, name)
+                try:
+                    if self.run_dir.shard_done(shard_id):
+                        os.remove(source)
+                    else:
+                        os.rename(source, os.path.join(self.run_dir.pending, shard_id))
+                        requeued += 1
+                except FileNotFoundError:
+                    pass
+        return requeued
+
+    def _spawn_workers(self):
+        for process in self.processes:
+            if process.poll():
+                self.worker_failures += 1
+        if self.worker_failures > 3 * self.workers:
+            raise RuntimeError("Local workers keep exiting with errors; see their output above")
+        self.processes = [p for p in self.processes if p.poll() is None]
+        if not os.listdir(self.run_dir.pending):
+            return
+        while len(self.processes) < self.workers:
+            self.processes.append(subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), 'worker', self.run_dir.path],
+                cwd=os.path.dirname(os.path.abspath(__file__))))
+
+    def _update_manifest(self):
+        claimed = {shard_id for shard_id, _, _ in self.run_dir.claimed_shards()}
+        for shard_id, shard in self.manifest['shards'].items():
+            if self.run_dir.shard_done(shard_id):
+                shard['status'] = 'done'
+            elif shard_id in claimed:
+                shard['status'] = 'running'
+            else:
+                shard['status'] = 'pending'
+        _write_json(self.run_dir.manifest_path, self.manifest)
+        return all(shard['status'] == 'done' for shard in self.manifest['shards'].values())
+
+    def merge(self):
+        """Combine per-shard stores into one ResultStore in shard order"""
+        if self.manifest.get('merged'):
+            return
+        shutil.rmtree(self.run_dir.store, ignore_errors=True)
+        tmp_path = self.run_dir.store + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        merged = ResultStore(tmp_path)
+        failed = []
+        for shard_id in sorted(self.manifest['shards']):
+            shard_path = os.path.join(self.run_dir.results, shard_id)
+            shard_store = ResultStore(shard_path, read_only=True)
+            rows = []
+            for row in range(len(shard_store)):
+                plan = shard_store.plan(row)
+                totals = {name: float(shard_store.column(name)[row]) for name in ('production', 'setup', 'holding', 'total')}
+                rows.append((plan['sku'], plan['order'], plan['inventory'], plan['period_cost'], totals))
+            merged.append_batch(rows)
+            failed.extend(_read_json(os.path.join(shard_path, 'errors.json')))
+        _write_json(os.path.join(tmp_path, 'errors.json'), failed)
+        os.rename(tmp_path, self.run_dir.store)
+        self.manifest['merged'] = True
+        _write_json(self.run_dir.manifest_path, self.manifest)
+
+    def report(self, started, skus_before):
+        """Aggregate throughput for this invocation and per-worker utilization"""
+        elapsed = time.time() - started
+        workers = {}
+        for name in sorted(os.listdir(self.run_dir.workers)):
+            stats = _read_json(os.path.join(self.run_dir.workers, name))
+            if stats['updated'] < started:
+                continue
+            lifetime = max(stats['updated'] - stats['started'], 1e-9)
+            workers[name[:-len('.json')]] = {
+                'shards': stats['shards'],
+                'skus': stats['skus'],
+                'busy_seconds': stats['busy'],
+                'utilization': min(1.0, stats['busy'] / lifetime),
+            }
+        skus = sum(shard['skus'] for shard in self.manifest['shards'].values() if shard['status'] == 'done')
+        solved_now = skus - skus_before
+        return {
+            'shards': len(self.manifest['shards']),
+            'skus': skus,
+            'skus_this_run': solved_now,
+            'elapsed_seconds': elapsed,
+            'throughput_skus_per_second': solved_now / elapsed if elapsed > 0 else 0.0,
+            'workers': workers,
+        }
+
+    def run_until_done(self, input_path, shard_size=1000, spawn_workers=True):
+        started = time.time()
+        self.prepare(input_path, shard_size)
+        self._update_manifest()
+        skus_before = sum(shard['skus'] for shard in self.manifest['shards'].values() if shard['status'] == 'done')
+        try:
+            while True:
+                self._requeue_dead()
+                if self._update_manifest():
+                    break
+                if spawn_workers:
+                    self._spawn_workers()
+                time.sleep(POLL_INTERVAL)
+        finally:
+            for process in self.processes:
+                process.wait()
+        self.merge()
+        return self.report(started, skus_before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded batch inventory optimization")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Coordinate a batch run (resumes if the run directory exists)")
+    run_parser.add_argument('input', help="JSON lines file of SKU records")
+    run_parser.add_argument('run_dir')
+    run_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Local worker processes to keep running")
+    run_parser.add_argument('--shard-size', type=int, default=1000)
+    run_parser.add_argument('--no-local-workers', action='store_true', help="Only coordinate; workers run elsewhere")
+    run_parser.add_argument('--heartbeat-timeout', type=float, default=HEARTBEAT_TIMEOUT)
+
+    worker_parser = commands.add_parser('worker', help="Solve shards from a run directory's queue")
+    worker_parser.add_argument('run_dir')
+    worker_parser.add_argument('--worker-id')
+
+    args = parser.parse_args()
+    if args.command == 'worker':
+        Worker(args.run_dir, args.worker_id).run()
+    else:
+        coordinator = Coordinator(args.run_dir, args.workers, args.heartbeat_timeout)
+        report = coordinator.run_until_done(args.input, args.shard_size, not args.no_local_workers)
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,9 @@
+import math
+import threading
+
+import numpy as np
+
+
 class EOQCalculator:
     def __init__(self, n, demand, production_cost, setup_cost, holding_cost):
         self.n = n
@@ -72,3 +78,369 @@ class InventoryOptimizer:
             else:
                 next_inventory1 = l
         return optimal_sol
+
+
+class SolverWorkspace:
+    """Preallocated DP buffers that grow on demand and are reused across solves.
+
+    A workspace is not thread-safe; keep one per thread or worker process.
+    """
+
+    def __init__(self, n=0, max_storage=0, max_order=1):
+        self.period_capacity = 0
+        self.state_capacity = 0
+        self.level_capacity = 0
+        self.reserve(n, max_storage, max_order)
+
+    def reserve(self, n, max_storage, max_order):
+        """Grow buffers to fit n months and max_storage + 1 inventory states"""
+        states = max_storage + 1
+        levels = max(1, range_table_levels(max_order, states))
+        if states > self.state_capacity or levels > self.level_capacity:
+            self.state_capacity = max(states, self.state_capacity)
+            self.level_capacity = max(levels, self.level_capacity)
+            self._allocate_states()
+            self.period_capacity = 0
+        if n > self.period_capacity:
+            self.period_capacity = max(n, 2 * self.period_capacity)
+            self.orders = np.empty((self.period_capacity, self.state_capacity), dtype=np.int64)
+            self.plan = np.empty(self.period_capacity, dtype=np.int64)
+
+    def _allocate_states(self):
+        size, levels = self.state_capacity, self.level_capacity
+        self.inventory = np.arange(size, dtype=np.int64)
+        self.log2_floor = np.zeros(size + 1, dtype=np.int64)
+        self.log2_floor[2:] = np.floor(np.log2(np.arange(2, size + 1))).astype(np.int64)
+        for name in ('carried', 'clipped', 'lo', 'hi', 'level', 'right_start', 'flat', 'best_next', 'other_next'):
+            setattr(self, name, np.empty(size, dtype=np.int64))
+        for name in ('skip_cost', 'order_cost', 'best', 'other', 'scratch'):
+            setattr(self, name, np.empty(size))
+        self.mask = np.empty(size, dtype=bool)
+        self.no_order = np.empty(size, dtype=bool)
+        self.cost_rows = np.empty((2, size))
+        self.table = np.empty((levels, size))
+        self.where = np.empty((levels, size), dtype=np.int64)
+
+
+_thread_workspaces = threading.local()
+
+
+def thread_workspace():
+    """Return this thread's reusable SolverWorkspace"""
+    workspace = getattr(_thread_workspaces, 'workspace', None)
+    if workspace is None:
+        workspace = _thread_workspaces.workspace = SolverWorkspace()
+    return workspace
+
+
+def range_table_levels(max_width, size):
+    """Number of sparse-table levels needed for windows of up to max_width over size values"""
+    return min(max_width, size).bit_length()
+
+
+def build_range_level_into(workspace, level, weight, next_cost, start, stop):
+    """Fill entries [start, stop) of one sparse-table level; level 0 holds weight * k + next_cost[k].
+
+    Level l covers windows of 2**l values and needs level l - 1 complete, so callers splitting
+    the work across threads must finish each level before starting the next.
+    """
+    table, where, mask = workspace.table, workspace.where, workspace.mask
+    if level == 0:
+        np.multiply(workspace.inventory[start:stop], weight, out=table[0, start:stop])
+        np.add(table[0, start:stop], next_cost[start:stop], out=table[0, start:stop])
+        where[0, start:stop] = workspace.inventory[start:stop]
+        return
+    half = 1 << (level - 1)
+    left, right = table[level - 1, start:stop], table[level - 1, start + half:stop + half]
+    np.less(right, left, out=mask[start:stop])
+    np.minimum(left, right, out=table[level, start:stop])
+    np.copyto(where[level, start:stop], where[level - 1, start:stop])
+    np.copyto(where[level, start:stop], where[level - 1, start + half:stop + half], where=mask[start:stop])
+
+
+def level_size(level, size):
+    """Number of valid entries in a sparse-table level"""
+    return size - (1 << level) + 1
+
+
+def range_argmin_into(workspace, lo, hi, start, stop):
+    """Answer windows [lo, hi] for states [start, stop) into workspace.best / workspace.best_next"""
+    ws = workspace
+    level, right_start, flat = ws.level[start:stop], ws.right_start[start:stop], ws.flat[start:stop]
+    best, other = ws.best[start:stop], ws.other[start:stop]
+    best_next, other_next = ws.best_next[start:stop], ws.other_next[start:stop]
+    table, where = ws.table.reshape(-1), ws.where.reshape(-1)
+
+    # Two overlapping power-of-two windows cover [lo, hi]
+    np.subtract(hi, lo, out=flat)
+    np.add(flat, 1, out=flat)
+    np.take(ws.log2_floor, flat, out=level)
+    np.left_shift(1, level, out=right_start)
+    np.subtract(hi, right_start, out=right_start)
+    np.add(right_start, 1, out=right_start)
+
+    np.multiply(level, ws.state_capacity, out=level)
+    np.add(level, lo, out=flat)
+    np.take(table, flat, out=best)
+    np.take(where, flat, out=best_next)
+    np.add(level, right_start, out=flat)
+    np.take(table, flat, out=other)
+    np.take(where, flat, out=other_next)
+
+    mask = ws.mask[start:stop]
+    np.less(other, best, out=mask)
+    np.copyto(best, other, where=mask)
+    np.copyto(best_next, other_next, where=mask)
+
+
+def dp_states_into(workspace, next_cost, period_demand, max_order, max_storage, production_cost, setup_cost,
+                   holding_cost, cost_out, order_out, start, stop, next_lo=0):
+    """Evaluate starting inventories [start, stop) of one backward DP step.
+
+    Orders only target next inventories in [next_lo, max_storage], so the sparse tables for this
+    step need only cover that window. Different state ranges touch disjoint workspace slices,
+    so ranges can be evaluated concurrently on one workspace.
+    """
+    ws = workspace
+    inventory, carried, clipped = ws.inventory[start:stop], ws.carried[start:stop], ws.clipped[start:stop]
+    lo, hi, mask, no_order = ws.lo[start:stop], ws.hi[start:stop], ws.mask[start:stop], ws.no_order[start:stop]
+    skip_cost, order_cost, scratch = ws.skip_cost[start:stop], ws.order_cost[start:stop], ws.scratch[start:stop]
+    cost_out, order_out = cost_out[start:stop], order_out[start:stop]
+
+    # Option 1: no order, carry i - demand into next month
+    np.subtract(inventory, period_demand, out=carried)
+    np.clip(carried, 0, max_storage, out=clipped)
+    np.take(next_cost, clipped, out=skip_cost)
+    np.multiply(clipped, holding_cost, out=scratch)
+    np.add(skip_cost, scratch, out=skip_cost)
+    np.less(carried, 0, out=mask)
+    np.copyto(skip_cost, np.inf, where=mask)
+
+    # Option 2: order so that next inventory k lands in [lo, hi]; minimize over k with a range query
+    np.add(carried, 1, out=lo)
+    np.maximum(lo, next_lo, out=lo)
+    np.add(carried, max_order, out=hi)
+    np.minimum(hi, max_storage, out=hi)
+    np.greater(lo, hi, out=no_order)
+    np.copyto(lo, 0, where=no_order)
+    np.copyto(hi, 0, where=no_order)
+
+    range_argmin_into(ws, lo, hi, start, stop)
+    np.subtract(period_demand, inventory, out=order_cost)
+    np.multiply(order_cost, production_cost, out=order_cost)
+    np.add(order_cost, setup_cost, out=order_cost)
+    np.add(order_cost, ws.best[start:stop], out=order_cost)
+    np.copyto(order_cost, np.inf, where=no_order)
+
+    # Pick the cheaper option; ties keep the no-order choice
+    np.minimum(skip_cost, order_cost, out=cost_out)
+    np.subtract(ws.best_next[start:stop], carried, out=order_out)
+    np.less(order_cost, skip_cost, out=mask)
+    np.logical_not(mask, out=mask)
+    np.copyto(order_out, 0, where=mask)
+    np.isinf(cost_out, out=mask)
+    np.copyto(order_out, -1, where=mask)
+
+
+def dp_period_into(workspace, next_cost, period_demand, max_order, max_storage, production_cost, setup_cost,
+                   holding_cost, cost_out, order_out):
+    """One backward DP step over every starting inventory 0..max_storage, writing only into preallocated buffers.
+
+    States with no feasible order get cost inf and order -1.
+    """
+    size = max_storage + 1
+    for level in range(range_table_levels(max_order, size)):
+        build_range_level_into(workspace, level, production_cost + holding_cost, next_cost,
+                               0, size if level == 0 else level_size(level, size))
+    dp_states_into(workspace, next_cost, period_demand, max_order, max_storage, production_cost, setup_cost,
+                   holding_cost, cost_out, order_out, 0, size)
+
+
+def dp_period(next_cost, period_demand, max_order, max_storage, production_cost, setup_cost, holding_cost,
+              workspace=None):
+    """One backward DP step returning freshly allocated (cost, order) arrays"""
+    if workspace is None:
+        workspace = thread_workspace()
+    workspace.reserve(0, max_storage, max_order)
+    cost = np.empty(max_storage + 1)
+    order = np.empty(max_storage + 1, dtype=np.int64)
+    dp_period_into(workspace, next_cost, period_demand, max_order, max_storage,
+                   production_cost, setup_cost, holding_cost, cost, order)
+    return cost, order
+
+
+def solve_into(workspace, n, demand, max_order, max_storage, production_cost, setup_cost, holding_cost,
+               holding_weights=None):
+    """Run the full backward DP inside the workspace and return the optimal cost.
+
+    holding_weights optionally scales the holding cost per month. Order tables are left in
+    workspace.orders[:n, :max_storage + 1]; use trace_plan_into to read the plan.
+    """
+    workspace.reserve(n, max_storage, max_order)
+    size = max_storage + 1
+    rows = workspace.cost_rows
+    rows[0, :size] = 0
+    for t in range(n - 1, -1, -1):
+        next_row, row = rows[(n - 1 - t) % 2, :size], rows[(n - t) % 2, :size]
+        holding = holding_cost if holding_weights is None else holding_cost * holding_weights[t]
+        dp_period_into(workspace, next_row, demand[t], max_order, max_storage, production_cost, setup_cost,
+                       holding, row, workspace.orders[t, :size])
+    return float(rows[n % 2, 0])
+
+
+def trace_plan_into(workspace, n, demand):
+    """Follow the workspace order tables forward, writing order quantities into workspace.plan[:n]"""
+    inventory = 0
+    for t in range(n):
+        ordered = workspace.orders[t, inventory]
+        if ordered < 0:
+            raise ValueError("No feasible plan: month {} cannot be supplied within capacity limits".format(t + 1))
+        workspace.plan[t] = ordered
+        inventory = inventory + ordered - demand[t]
+    return workspace.plan[:n]
+
+
+def trace_plan(orders, demand, start_period=0, start_inventory=0):
+    """Follow per-month order tables forward into the optimal_sol format"""
+    optimal_sol = []
+    inventory = start_inventory
+    for t in range(start_period, len(demand)):
+        ordered = int(orders[t][inventory])
+        if ordered < 0:
+            raise ValueError("No feasible plan: month {} cannot be supplied within capacity limits".format(t + 1))
+        optimal_sol.append(["for month {}; order=".format(t + 1), ordered])
+        inventory = inventory + ordered - demand[t]
+    return optimal_sol
+
+
+def compress_zero_demand(demand, max_order, max_storage):
+    """Fold zero-demand months into the step before them, keeping only the months that may need to order.
+
+    Pushing an order one month later inside a zero run never costs more, so some optimal plan
+    orders only in the last months of each run, all at max_order except the earliest. Those
+    orders total at most what storage holds and what max_order at the next demand month cannot
+    supply, so each run keeps just that many trailing months as ordering steps. Returns
+    (periods, holding_weights): the months that keep their own DP step, and for how many months
+    each step's closing inventory is held. A leading run keeps its first month as a step.
+    """
+    n = len(demand)
+    remaining = sum(demand)
+    periods, holding_weights = [], []
+    t = 0
+    while t < n:
+        if demand[t] > 0:
+            periods.append(t)
+            holding_weights.append(1)
+            remaining -= demand[t]
+            t += 1
+            continue
+        end = t
+        while end < n and demand[end] == 0:
+            end += 1
+        ordering = 0
+        if end < n:
+            prebuild = min(max_storage, max_storage + demand[end] - max_order, remaining - max_order)
+            ordering = min(end - t, max(0, -(-prebuild // max_order)))
+        folded = end - t - ordering
+        if folded and periods:
+            holding_weights[-1] += folded
+        elif folded:
+            periods.append(t)
+            holding_weights.append(folded)
+        periods.extend(range(end - ordering, end))
+        holding_weights.extend([1] * ordering)
+        t = end
+    return periods, holding_weights
+
+
+def expand_plan(step_orders, periods, n):
+    """Map orders of compressed steps back onto all n months in the optimal_sol format"""
+    orders = [0] * n
+    for t, ordered in zip(periods, step_orders):
+        orders[t] = int(ordered)
+    return [["for month {}; order=".format(t + 1), orders[t]] for t in range(n)]
+
+
+def solve_intermittent(n, demand, max_order, max_storage, production_cost, setup_cost, holding_cost,
+                       workspace=None):
+    """Solve with zero-demand runs compressed, so work scales with the number of demand months.
+
+    Runs presolve first, so infeasible input raises ValueError with its diagnostic.
+    """
+    from presolve import presolve, solve_presolved  # presolve builds on the kernels in this module
+    optimal_sol, _ = solve_presolved(presolve(n, demand, max_order, max_storage), production_cost, setup_cost,
+                                     holding_cost, workspace)
+    return optimal_sol
+
+
+def solve_checkpointed(n, demand, max_order, max_storage, production_cost, setup_cost, holding_cost,
+                       checkpoint_interval=None, workspace=None):
+    """Solve keeping only every k-th cost-to-go row, recomputing one segment at a time to rebuild the plan.
+
+    Runs presolve first: infeasible input raises ValueError with its diagnostic, and the DP runs over
+    the presolved steps and bounds. Memory holds about (steps / k + k) rows of the tightened
+    max_storage + 1 values instead of one per step, at roughly twice the DP work; k defaults to
+    sqrt(steps), and k >= steps falls back to storing every order row. Returns (optimal_sol, total_cost).
+    """
+    from presolve import presolve, presolved_step_into  # presolve builds on the kernels in this module
+    problem = presolve(n, demand, max_order, max_storage)
+    if not problem.feasible:
+        raise ValueError("No feasible plan: " + problem.diagnostic)
+    if workspace is None:
+        workspace = thread_workspace()
+    workspace.reserve(1, problem.max_storage, problem.max_order)
+    steps = problem.steps
+    interval = checkpoint_interval or max(1, math.isqrt(steps))
+    size = problem.max_storage + 1
+    rows, scratch_order = workspace.cost_rows, workspace.orders[0, :size]
+    # checkpoints[c] holds the cost-to-go at the start of step c * interval
+    checkpoints = np.empty(((steps - 1) // interval + 1, size))
+    terminal = np.zeros(size)
+
+    next_row = terminal
+    for t in range(steps - 1, -1, -1):
+        row = rows[t % 2, :size]
+        presolved_step_into(problem, workspace, t, next_row, production_cost, setup_cost, holding_cost,
+                            row, scratch_order)
+        if t % interval == 0:
+            checkpoints[t // interval] = row
+        next_row = row
+    total_cost = float(checkpoints[0, 0])
+
+    # Rebuild each segment's order rows from the checkpoint after it, then walk it forward
+    segment_orders = np.empty((min(interval, steps), size), dtype=np.int64)
+    step_orders = []
+    inventory = 0
+    for start in range(0, steps, interval):
+        end = min(start + interval, steps)
+        next_row = checkpoints[end // interval] if end < steps else terminal
+        for t in range(end - 1, start - 1, -1):
+            row = rows[t % 2, :size]
+            presolved_step_into(problem, workspace, t, next_row, production_cost, setup_cost, holding_cost,
+                                row, segment_orders[t - start])
+            next_row = row
+        for t in range(start, end):
+            ordered = int(segment_orders[t - start, inventory])
+            step_orders.append(ordered)
+            inventory = inventory + ordered - problem.step_demand[t]
+    return problem.expand(step_orders), total_cost
+
+
+class VectorizedInventoryOptimizer:
+    def __init__(self, workspace=None):
+        self.workspace = workspace
+
+    def calculate_min_cost(self, n, demand, max_order, max_storage, production_cost, setup_cost, holding_cost):
+        """Presolve and solve, returning a per-month order table over the tightened storage range.
+
+        The table is a new array, so later solves on a shared workspace cannot overwrite it.
+        Infeasible input raises ValueError with the presolve diagnostic.
+        """
+        from presolve import presolve, solve_presolved  # presolve builds on the kernels in this module
+        problem = presolve(n, demand, max_order, max_storage)
+        workspace = self.workspace or SolverWorkspace()
+        solve_presolved(problem, production_cost, setup_cost, holding_cost, workspace)
+        return problem.expand_orders(workspace.orders[:problem.steps, :problem.max_storage + 1])
+
+    def calculate_optimal_sol(self, n, optimal_order, demand):
+        return trace_plan(optimal_order[:n], demand[:n])
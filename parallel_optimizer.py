@@ -0,0 +1,95 @@
+"""Multi-threaded DP for single very large instances.
+
+The problem is presolved first, then each backward step splits its sparse-table levels and its
+sweep over the step's bounded starting inventories into chunks run on a thread pool, with a
+barrier after every level and after the sweep. The NumPy
+kernels release the GIL, so chunks can run in parallel on separate cores. Multi-core speedup
+has not been measured yet; run benchmark_scaling on the target hardware before relying on it.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from inventory_optimizer import SolverWorkspace, trace_plan
+from presolve import presolve, solve_presolved
+
+# Below this many states per chunk, thread hand-off costs more than it saves
+MIN_CHUNK = 16384
+
+
+class ParallelInventoryOptimizer:
+    """Use as a context manager, or call close(), to shut down the thread pool"""
+
+    def __init__(self, threads=None, min_chunk=MIN_CHUNK):
+        self.threads = threads or os.cpu_count() or 1
+        self.min_chunk = min_chunk
+        self.workspace = SolverWorkspace()
+        self.executor = ThreadPoolExecutor(max_workers=self.threads) if self.threads > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
+
+    def _chunks(self, stop):
+        count = max(1, min(self.threads, stop // self.min_chunk))
+        bounds = [stop * k // count for k in range(count + 1)]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _run_chunks(self, task, stop):
+        """Run task(start, stop) over chunks of [0, stop) and wait for all of them"""
+        chunks = self._chunks(stop)
+        if self.executor is None or len(chunks) == 1:
+            for start, end in chunks:
+                task(start, end)
+            return
+        for future in [self.executor.submit(task, start, end) for start, end in chunks]:
+            future.result()
+
+    def solve(self, n, demand, max_order, max_storage, production_cost, setup_cost, holding_cost):
+        """Presolve, run the backward DP in the optimizer's workspace and return the optimal cost.
+
+        Infeasible input raises ValueError with the presolve diagnostic. The presolved problem is
+        kept as self.problem and its step order tables in the workspace.
+        """
+        self.problem = presolve(n, demand, max_order, max_storage)
+        _, cost = solve_presolved(self.problem, production_cost, setup_cost, holding_cost, self.workspace,
+                                  self._run_chunks)
+        return cost
+
+    def calculate_min_cost(self, n, demand, max_order, max_storage, production_cost, setup_cost, holding_cost):
+        """Return a per-month order table; it is a new array, so the next solve cannot overwrite it"""
+        self.solve(n, demand, max_order, max_storage, production_cost, setup_cost, holding_cost)
+        return self.problem.expand_orders(self.workspace.orders[:self.problem.steps, :self.problem.max_storage + 1])
+
+    def calculate_optimal_sol(self, n, optimal_order, demand):
+        return trace_plan(optimal_order[:n], demand[:n])
+
+
+def benchmark_scaling(thread_counts=(1, 2, 4, 8, 16), n=12, max_storage=2000000, max_order=250000, repeats=3):
+    """Time one large solve at each thread count; returns {threads: (seconds, speedup)}"""
+    demand = [100000 + 20000 * (t % 4) for t in range(n)]
+    timings = {}
+    for threads in thread_counts:
+        with ParallelInventoryOptimizer(threads) as optimizer:
+            optimizer.solve(1, demand, max_order, max_storage, 10, 500, 0.01)  # size the workspace once
+            best = float('inf')
+            for _ in range(repeats):
+                started = time.perf_counter()
+                optimizer.solve(n, demand, max_order, max_storage, 10, 500, 0.01)
+                best = min(best, time.perf_counter() - started)
+        timings[threads] = best
+    return {threads: (seconds, timings[thread_counts[0]] / seconds) for threads, seconds in timings.items()}
+
+
+if __name__ == "__main__":
+    print("Strong scaling on {} available cores".format(os.cpu_count()))
+    print("threads  seconds  speedup")
+    for threads, (seconds, speedup) in benchmark_scaling().items():
+        print("{:>7}  {:>7.2f}  {:>7.2f}".format(threads, seconds, speedup))
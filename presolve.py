@@ -0,0 +1,202 @@
+"""Presolve stage run before any DP engine.
+
+In O(n) it proves infeasibility with a diagnostic naming the earliest failing months, bounds
+each month's starting inventory from prefix/suffix demand, finds forced and fixed orders,
+tightens max_order/max_storage, and folds zero-demand runs where skipping orders there provably
+loses nothing. The engines then solve the smaller problem: each step sweeps only its bounded
+states, builds range tables only over the next step's window, and fixed orders skip the tables.
+The plan is expanded back to every month.
+"""
+import numpy as np
+
+from inventory_optimizer import (build_range_level_into, compress_zero_demand, dp_states_into, expand_plan,
+                                 level_size, range_table_levels, thread_workspace, trace_plan_into)
+
+
+class PresolvedProblem:
+    def __init__(self, n, demand, max_order, max_storage):
+        self.n = n
+        self.demand = list(demand[:n])
+        self.original_max_order = max_order
+        self.original_max_storage = max_storage
+        self.feasible = True
+        self.diagnostic = None
+        self.forced_setups = []
+        self.fixed_orders = {}
+        self.periods = []
+        self.holding_weights = []
+        self.step_demand = []
+        self.state_lo = []
+        self.state_hi = []
+        self.max_order = max_order
+        self.max_storage = max_storage
+
+    @property
+    def steps(self):
+        return len(self.periods)
+
+    def next_window(self, step):
+        """Range of inventory the step after `step` can start with; (0, 0) after the last step"""
+        if step + 1 < self.steps:
+            return self.state_lo[step + 1], self.state_hi[step + 1]
+        return 0, 0
+
+    def expand(self, step_orders):
+        """Map orders of the reduced steps back onto all months in the optimal_sol format"""
+        return expand_plan(step_orders, self.periods, self.n)
+
+    def expand_orders(self, step_tables):
+        """Map per-step order tables onto a per-month table; folded months never order"""
+        table = np.zeros((self.n, step_tables.shape[1]), dtype=np.int64)
+        table[self.periods] = step_tables
+        return table
+
+    def report(self):
+        """Summarize how much smaller the presolved problem is"""
+        states = sum(hi - lo + 1 for lo, hi in zip(self.state_lo, self.state_hi))
+        return {
+            'feasible': self.feasible,
+            'diagnostic': self.diagnostic,
+            'months': self.n,
+            'steps': self.steps,
+            'merged_months': self.n - self.steps if self.feasible else 0,
+            'max_order': (self.original_max_order, self.max_order),
+            'max_storage': (self.original_max_storage, self.max_storage),
+            'dp_states': (self.n * (self.original_max_storage + 1), states),
+            'forced_setups': len(self.forced_setups),
+            'fixed_orders': len(self.fixed_orders),
+        }
+
+
+def required_inventory(demand, max_order):
+    """Minimum inventory each month must start with so later demand stays reachable"""
+    required = [0] * (len(demand) + 1)
+    for t in range(len(demand) - 1, -1, -1):
+        required[t] = max(0, demand[t] + required[t + 1] - max_order)
+    return required
+
+
+def _infeasibility(demand, max_order, max_storage):
+    """Scan forward and describe the earliest month by which demand cannot be met, or return None"""
+    shortfall = 0                    # demand minus order capacity since month 1
+    excess, excess_start = 0, 1      # largest such excess over windows ending this month, starting after month 1
+    for t, period_demand in enumerate(demand):
+        shortfall += period_demand - max_order
+        if shortfall > 0:
+            return ("Demand through month {} ({}) exceeds cumulative order capacity ({}) by {}"
+                    .format(t + 1, sum(demand[:t + 1]), (t + 1) * max_order, shortfall))
+        if t == 0:
+            continue
+        if excess <= 0:
+            excess, excess_start = 0, t
+        excess += period_demand - max_order
+        if excess > max_storage:
+            if excess_start == t:
+                return ("Month {} demand of {} exceeds max order plus max storage ({} + {})"
+                        .format(t + 1, period_demand, max_order, max_storage))
+            return ("Months {}-{} need {} units in stock at the start of month {} (demand {} vs order capacity {}), "
+                    "but storage holds only {}".format(excess_start + 1, t + 1, excess, excess_start + 1,
+                                                       sum(demand[excess_start:t + 1]),
+                                                       (t + 1 - excess_start) * max_order, max_storage))
+    return None
+
+
+def presolve(n, demand, max_order, max_storage):
+    """Return a PresolvedProblem; check .feasible and .diagnostic before solving"""
+    problem = PresolvedProblem(n, demand, max_order, max_storage)
+    demand = problem.demand
+    problem.diagnostic = _infeasibility(demand, max_order, max_storage)
+    if problem.diagnostic:
+        problem.feasible = False
+        return problem
+
+    required = required_inventory(demand, max_order)
+    suffix = [0] * (n + 1)
+    for t in range(n - 1, -1, -1):
+        suffix[t] = suffix[t + 1] + demand[t]
+
+    # Highest useful starting stock: reachable from empty and never more than what is still needed
+    reachable = [0] * (n + 1)
+    for t in range(n):
+        reachable[t + 1] = min(max_storage, reachable[t] + max_order - demand[t], suffix[t + 1])
+
+    for t in range(n):
+        least_order = required[t + 1] + demand[t] - reachable[t]
+        if least_order > 0:
+            problem.forced_setups.append(t)
+        if least_order == max_order:
+            problem.fixed_orders[t] = max_order
+
+    problem.periods, problem.holding_weights = compress_zero_demand(demand, max_order, max_storage)
+    problem.step_demand = [demand[t] for t in problem.periods]
+    problem.state_lo = [required[t] for t in problem.periods]
+    problem.state_hi = [reachable[t] for t in problem.periods]
+    problem.max_storage = max(problem.state_hi, default=0)
+    problem.max_order = max(1, min(max_order, max((reachable[t + 1] + demand[t] - required[t] for t in range(n)),
+                                                  default=1)))
+    return problem
+
+
+def _run_whole(task, count):
+    task(0, count)
+
+
+def presolved_step_into(problem, workspace, step, next_cost, production_cost, setup_cost, holding_cost,
+                        cost_out, order_out, run_chunks=None):
+    """One backward DP step of a presolved problem, writing only the step's bounded state range.
+
+    next_cost must be inf below the next step's lower bound. States outside the range get cost
+    inf and order -1. The workspace must be reserved for problem.max_storage and problem.max_order.
+    run_chunks(task, count) may split task(start, stop) over [0, count) across threads, returning
+    once every chunk is done.
+    """
+    run_chunks = run_chunks or _run_whole
+    lo, hi = problem.state_lo[step], problem.state_hi[step]
+    next_lo, next_hi = problem.next_window(step)
+    period_demand = problem.step_demand[step]
+    holding = holding_cost * problem.holding_weights[step]
+    cost_out[:lo], cost_out[hi + 1:] = np.inf, np.inf
+    order_out[:lo], order_out[hi + 1:] = -1, -1
+
+    fixed_order = problem.fixed_orders.get(problem.periods[step])
+    if fixed_order is not None:
+        # A fixed order is only feasible from the highest starting stock, so there is nothing to minimize
+        cost_out[lo:hi], order_out[lo:hi] = np.inf, -1
+        next_inventory = hi + fixed_order - period_demand
+        cost_out[hi] = (production_cost * fixed_order + setup_cost + holding * next_inventory
+                        + next_cost[next_inventory])
+        order_out[hi] = fixed_order
+        return
+
+    width = next_hi - next_lo + 1
+    for level in range(range_table_levels(problem.max_order, width)):
+        run_chunks(lambda start, stop, level=level: build_range_level_into(
+            workspace, level, production_cost + holding, next_cost, next_lo + start, next_lo + stop),
+            width if level == 0 else level_size(level, width))
+    run_chunks(lambda start, stop: dp_states_into(
+        workspace, next_cost, period_demand, problem.max_order, next_hi, production_cost, setup_cost, holding,
+        cost_out, order_out, lo + start, lo + stop, next_lo), hi - lo + 1)
+
+
+def solve_presolved(problem, production_cost, setup_cost, holding_cost, workspace=None, run_chunks=None):
+    """Solve a feasible PresolvedProblem one presolved step at a time.
+
+    Returns (optimal_sol, total_cost) over all original months and leaves the per-step order
+    tables in workspace.orders[:problem.steps]. run_chunks is passed to presolved_step_into.
+    """
+    if not problem.feasible:
+        raise ValueError("No feasible plan: " + problem.diagnostic)
+    if workspace is None:
+        workspace = thread_workspace()
+    steps, size = problem.steps, problem.max_storage + 1
+    workspace.reserve(max(steps, 1), problem.max_storage, problem.max_order)
+    rows = workspace.cost_rows
+    rows[0, :size] = 0
+
+    for t in range(steps - 1, -1, -1):
+        next_row, row = rows[(steps - 1 - t) % 2, :size], rows[(steps - t) % 2, :size]
+        presolved_step_into(problem, workspace, t, next_row, production_cost, setup_cost, holding_cost,
+                            row, workspace.orders[t, :size], run_chunks)
+
+    step_orders = trace_plan_into(workspace, steps, problem.step_demand)
+    return problem.expand(step_orders), float(rows[steps % 2, 0])
@@ -0,0 +1,210 @@
+import json
+import os
+import fcntl
+from contextlib import contextmanager
+
+import numpy as np
+
+from utils import calculate_detailed_costs, calculate_cost_breakdown
+
+SKU_WIDTH = 64
+
+# Per-period columns hold one value per month of every stored plan
+PERIOD_COLUMNS = {
+    'order': np.int64,
+    'inventory': np.int64,
+    'period_cost': np.float64,
+}
+
+# Per-SKU columns hold one value per stored plan
+SKU_COLUMNS = {
+    'sku': 'S{}'.format(SKU_WIDTH),
+    'production': np.float64,
+    'setup': np.float64,
+    'holding': np.float64,
+    'total': np.float64,
+}
+
+# The index is written last, so a row only exists once its index entry does
+INDEX_DTYPE = np.dtype([('start', np.int64), ('length', np.int64)])
+
+
+def encode_sku(sku):
+    """Return the SKU as UTF-8 bytes, rejecting SKUs that do not fit the fixed-width column"""
+    encoded = str(sku).encode('utf-8')
+    if len(encoded) > SKU_WIDTH:
+        raise ValueError("SKU {!r} is longer than {} bytes".format(str(sku), SKU_WIDTH))
+    return encoded
+
+
+def solution_row(sku, optimal_sol, demand, production_cost, setup_cost, holding_cost):
+    """Build an append_batch row from an optimal_sol using the dashboard's cost accounting"""
+    encode_sku(sku)
+    results_data, _ = calculate_detailed_costs(optimal_sol, demand, production_cost, setup_cost, holding_cost)
+    cost_breakdown = calculate_cost_breakdown(optimal_sol, demand, production_cost, setup_cost, holding_cost)
+    return (
+        sku,
+        [row['Order Quantity'] for row in results_data],
+        [row['Inventory (After Demand)'] for row in results_data],
+        [row['Monthly Cost'] for row in results_data],
+        cost_breakdown,
+    )
+
+
+class ResultStore:
+    """Append-only columnar store for batch plans, read back through memory maps.
+
+    With read_only=True nothing is created or written, and a directory without meta.json is rejected.
+    """
+
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        meta_path = os.path.join(path, 'meta.json')
+        if read_only:
+            if not os.path.exists(meta_path):
+                raise ValueError("{} is not a result store (no meta.json)".format(path))
+        else:
+            os.makedirs(path, exist_ok=True)
+        if not read_only and not os.path.exists(meta_path):
+            with self._locked():
+                if not os.path.exists(meta_path):
+                    with open(meta_path, 'w') as f:
+                        json.dump({'version': 1, 'sku_width': SKU_WIDTH}, f)
+        self._maps = {}
+        self._mapped_rows = -1
+
+    def _file(self, name):
+        return os.path.join(self.path, name + '.bin')
+
+    @contextmanager
+    def _locked(self):
+        """Hold an exclusive lock so concurrent writers append one at a time"""
+        with open(os.path.join(self.path, '.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def __len__(self):
+        index_path = self._file('index')
+        if not os.path.exists(index_path):
+            return 0
+        return os.path.getsize(index_path) // INDEX_DTYPE.itemsize
+
+    def _committed_periods(self, rows):
+        """Number of period values covered by the first `rows` index entries"""
+        if rows == 0:
+            return 0
+        with open(self._file('index'), 'rb') as f:
+            f.seek((rows - 1) * INDEX_DTYPE.itemsize)
+            last = np.frombuffer(f.read(INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE)[0]
+        return int(last['start'] + last['length'])
+
+    def append(self, sku, order_quantities, inventory_levels, period_costs, cost_breakdown):
+        """Append a single plan and its cost totals"""
+        self.append_batch([(sku, order_quantities, inventory_levels, period_costs, cost_breakdown)])
+
+    def append_solution(self, sku, optimal_sol, demand, production_cost, setup_cost, holding_cost):
+        """Append an optimal_sol using the same cost accounting as the dashboard"""
+        self.append_batch([solution_row(sku, optimal_sol, demand, production_cost, setup_cost, holding_cost)])
+
+    def append_batch(self, rows):
+        """Append many plans under one lock; rows are (sku, orders, inventory, costs, cost_breakdown)"""
+        if self.read_only:
+            raise ValueError("Result store {} was opened read-only".format(self.path))
+        rows = list(rows)
+        if not rows:
+            return
+        skus = [encode_sku(row[0]) for row in rows]
+        lengths = [len(row[1]) for row in rows]
+        for row, length in zip(rows, lengths):
+            if len(row[2]) != length or len(row[3]) != length:
+                raise ValueError("Plan columns for SKU {!r} have different lengths".format(row[0]))
+
+        period_data = {
+            'order': np.concatenate([np.asarray(row[1], dtype=np.int64) for row in rows]),
+            'inventory': np.concatenate([np.asarray(row[2], dtype=np.int64) for row in rows]),
+            'period_cost': np.concatenate([np.asarray(row[3], dtype=np.float64) for row in rows]),
+        }
+        sku_data = {
+            'sku': np.array(skus, dtype=SKU_COLUMNS['sku']),
+            'production': np.array([row[4]['production'] for row in rows], dtype=np.float64),
+            'setup': np.array([row[4]['setup'] for row in rows], dtype=np.float64),
+            'holding': np.array([row[4]['holding'] for row in rows], dtype=np.float64),
+            'total': np.array([row[4]['total'] for row in rows], dtype=np.float64),
+        }
+
+        with self._locked():
+            committed_rows = len(self)
+            committed_periods = self._committed_periods(committed_rows)
+
+            # Drop anything a crashed writer left past the last committed row
+            for name, dtype in PERIOD_COLUMNS.items():
+                self._write_column(name, period_data[name], committed_periods * np.dtype(dtype).itemsize)
+            for name, dtype in SKU_COLUMNS.items():
+                self._write_column(name, sku_data[name], committed_rows * np.dtype(dtype).itemsize)
+
+            index = np.empty(len(rows), dtype=INDEX_DTYPE)
+            index['length'] = lengths
+            index['start'] = committed_periods + np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            self._write_column('index', index, committed_rows * INDEX_DTYPE.itemsize)
+
+    def _write_column(self, name, values, committed_bytes):
+        with open(self._file(name), 'ab') as f:
+            f.truncate(committed_bytes)
+            f.write(values.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _map(self, name, dtype, count):
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode='r', shape=(count,))
+
+    def _refresh(self):
+        """Remap columns when other writers have committed new rows"""
+        rows = len(self)
+        if rows == self._mapped_rows:
+            return
+        periods = self._committed_periods(rows)
+        self._maps = {'index': self._map('index', INDEX_DTYPE, rows)}
+        for name, dtype in SKU_COLUMNS.items():
+            self._maps[name] = self._map(name, dtype, rows)
+        for name, dtype in PERIOD_COLUMNS.items():
+            self._maps[name] = self._map(name, dtype, periods)
+        self._mapped_rows = rows
+
+    def column(self, name):
+        """Return a read-only memory-mapped column"""
+        self._refresh()
+        return self._maps[name]
+
+    def plan(self, row):
+        """Return the per-period arrays for one stored plan"""
+        self._refresh()
+        entry = self._maps['index'][row]
+        start, stop = int(entry['start']), int(entry['start'] + entry['length'])
+        return {
+            'sku': self._maps['sku'][row].decode('utf-8'),
+            'order': self._maps['order'][start:stop],
+            'inventory': self._maps['inventory'][start:stop],
+            'period_cost': self._maps['period_cost'][start:stop],
+        }
+
+    def page(self, start, size):
+        """Return per-SKU totals for rows [start, start + size) as a list of dicts"""
+        self._refresh()
+        stop = min(start + size, self._mapped_rows)
+        rows = []
+        for row in range(start, stop):
+            rows.append({
+                'SKU': self._maps['sku'][row].decode('utf-8'),
+                'Months': int(self._maps['index'][row]['length']),
+                'Production Cost': float(self._maps['production'][row]),
+                'Setup Cost': float(self._maps['setup'][row]),
+                'Holding Cost': float(self._maps['holding'][row]),
+                'Total Cost': float(self._maps['total'][row]),
+            })
+        return rows
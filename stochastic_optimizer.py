@@ -0,0 +1,106 @@
+"""Stochastic-demand DP: minimizes expected cost when each month's demand is a discrete distribution.
+
+Unmet demand is lost and charged shortage_cost per unit. Each month starts with inventory x,
+orders up to y (x <= y <= min(x + max_order, max_storage)), then demand D is drawn and
+min(y, D) units are sold. The result is an order-up-to policy table rather than a fixed plan.
+"""
+import math
+
+import numpy as np
+
+from inventory_optimizer import SolverWorkspace, build_range_level_into, level_size, range_table_levels, range_argmin_into
+
+# Supports longer than this use FFT convolution instead of direct summation
+FFT_THRESHOLD = 64
+
+
+def forecast_pmfs(forecast, error_std, coverage=4.0):
+    """Discretize forecast +/- error into per-month demand distributions.
+
+    error_std is a single standard deviation or one per month; each month's support covers
+    forecast + coverage * error_std, and probability below zero is folded onto zero demand.
+    """
+    stds = error_std if hasattr(error_std, '__len__') else [error_std] * len(forecast)
+    normal_cdf = np.vectorize(lambda z: 0.5 * (1.0 + math.erf(z / math.sqrt(2.0))))
+    pmfs = []
+    for mean, std in zip(forecast, stds):
+        if std <= 0:
+            pmf = np.zeros(int(round(mean)) + 1)
+            pmf[-1] = 1.0
+        else:
+            support = np.arange(int(math.ceil(mean + coverage * std)) + 1)
+            cdf = normal_cdf((support + 0.5 - mean) / std)
+            pmf = np.diff(np.concatenate(([0.0], cdf)))
+            pmf /= pmf.sum()
+        pmfs.append(pmf)
+    return pmfs
+
+
+def _convolve(values, pmf, size):
+    """First size entries of sum_d pmf[d] * values[y - d], by direct or FFT convolution"""
+    if len(pmf) <= FFT_THRESHOLD:
+        return np.convolve(values, pmf)[:size]
+    length = 1 << (len(values) + len(pmf) - 1).bit_length()
+    return np.fft.irfft(np.fft.rfft(values, length) * np.fft.rfft(pmf, length), length)[:size]
+
+
+def expected_stage_cost(next_cost, pmf, holding_cost, shortage_cost):
+    """G(y) = E[holding + shortage + next_cost((y - D)+)] for every order-up-to level y"""
+    size = len(next_cost)
+    levels = np.arange(size)
+    cdf = np.cumsum(pmf)
+    above = 1.0 - cdf[np.minimum(levels, len(pmf) - 1)]   # P(D > y)
+    above[levels >= len(pmf) - 1] = 0.0
+    mean = float(np.dot(np.arange(len(pmf)), pmf))
+
+    left_over = _convolve(levels.astype(float), pmf, size)   # E[(y - D)+]
+    short = mean - levels + left_over                          # E[(D - y)+]
+    future = _convolve(next_cost, pmf, size) + next_cost[0] * above
+    return holding_cost * left_over + shortage_cost * short + future
+
+
+class StochasticInventoryOptimizer:
+    def __init__(self, workspace=None):
+        self.workspace = workspace or SolverWorkspace()
+
+    def calculate_policy(self, n, demand_pmfs, max_order, max_storage, production_cost, setup_cost, holding_cost,
+                         shortage_cost):
+        """Return (order_up_to, expected_cost).
+
+        order_up_to[t][x] is the inventory level to order up to in month t when starting with x
+        units (x itself means do not order); expected_cost is the optimum starting from empty stock.
+        """
+        ws = self.workspace
+        ws.reserve(1, max_storage, max_order)
+        size = max_storage + 1
+        states = ws.inventory[:size]
+        order_up_to = np.empty((n, size), dtype=np.int64)
+        cost_to_go = np.zeros(size)
+        lo, hi = np.minimum(states + 1, max_storage), np.minimum(states + max_order, max_storage)
+
+        for t in range(n - 1, -1, -1):
+            stage = expected_stage_cost(cost_to_go, np.asarray(demand_pmfs[t], dtype=float), holding_cost, shortage_cost)
+
+            # Ordering from x to y costs setup + production * (y - x); minimize production * y + G(y) over the window
+            for level in range(range_table_levels(max_order, size)):
+                build_range_level_into(ws, level, production_cost, stage, 0, size if level == 0 else level_size(level, size))
+            range_argmin_into(ws, lo, hi, 0, size)
+            order_cost = ws.best[:size] + setup_cost - production_cost * states
+            order_cost[states == max_storage] = np.inf
+
+            use_order = order_cost < stage
+            order_up_to[t] = np.where(use_order, ws.best_next[:size], states)
+            cost_to_go = np.where(use_order, order_cost, stage)
+
+        return order_up_to, float(cost_to_go[0])
+
+    def policy_summary(self, order_up_to):
+        """Collapse each month's policy into (reorder point s, order-up-to level S) where it has that form"""
+        summary = []
+        for row in order_up_to:
+            ordering = np.nonzero(row > np.arange(len(row)))[0]
+            if len(ordering) == 0:
+                summary.append((None, None))
+            else:
+                summary.append((int(ordering.max()), int(row[ordering[0]])))
+        return summary
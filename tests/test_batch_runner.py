@@ -0,0 +1,53 @@
+import json
+import os
+import socket
+
+from batch_runner import Coordinator, Worker, _read_json
+from result_store import ResultStore
+
+GOOD = {'sku': 'A', 'demand': [10, 0, 10], 'max_order': 20, 'max_storage': 20,
+        'production_cost': 1, 'setup_cost': 30, 'holding_cost': 1}
+
+
+def test_bad_records_are_reported_without_failing_the_shard(tmp_path):
+    missing = dict(GOOD, sku='B')
+    del missing['max_order']
+    infeasible = dict(GOOD, sku='C', demand=[50])
+    negative = dict(GOOD, sku='D', demand=[-5, 10])
+    input_path = tmp_path / 'skus.jsonl'
+    input_path.write_text('\n'.join([json.dumps(GOOD), '', json.dumps(missing), '{not json', '[1, 2]',
+                                     json.dumps(infeasible), json.dumps(negative)]) + '\n')
+
+    run_dir = str(tmp_path / 'run')
+    coordinator = Coordinator(run_dir, workers=1)
+    coordinator.prepare(str(input_path), shard_size=10)
+    Worker(run_dir, worker_id='test-worker').run()
+
+    shard_path = os.path.join(run_dir, 'results', 'shard-000000')
+    assert len(ResultStore(shard_path, read_only=True)) == 1
+    errors = _read_json(os.path.join(shard_path, 'errors.json'))
+    # Line numbers refer to the input file, counting the blank line
+    assert [(error['sku'], error['line']) for error in errors] == [('B', 3), (None, 4), (None, 5), ('C', 6), ('D', 7)]
+    assert all(error['shard'] == 'shard-000000' for error in errors)
+    assert 'max_order' in errors[0]['error']
+    assert 'negative' in errors[4]['error']
+
+
+def test_relative_run_directory_from_another_cwd(tmp_path, monkeypatch):
+    lines = [json.dumps(dict(GOOD, sku='SKU{}'.format(i))) for i in range(6)] + [json.dumps(dict(GOOD, sku='X', demand=[99]))]
+    (tmp_path / 'skus.jsonl').write_text('\n'.join(lines) + '\n')
+    monkeypatch.chdir(tmp_path)
+
+    report = Coordinator('run', workers=2).run_until_done('skus.jsonl', shard_size=3)
+    assert report['skus'] == 7
+    store = ResultStore(str(tmp_path / 'run' / 'store'), read_only=True)
+    assert len(store) == 6
+    assert [(error['shard'], error['line']) for error in _read_json(str(tmp_path / 'run' / 'store' / 'errors.json'))] == \
+        [('shard-000002', 7)]
+
+
+def test_live_local_worker_without_heartbeat_is_alive(tmp_path):
+    coordinator = Coordinator(str(tmp_path))
+    coordinator.run_dir.create_dirs()
+    assert coordinator._worker_alive('{}-{}'.format(socket.gethostname(), os.getpid()))
+    assert not coordinator._worker_alive('remote-host-1')
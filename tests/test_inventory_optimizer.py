@@ -0,0 +1,95 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from inventory_optimizer import (SolverWorkspace, VectorizedInventoryOptimizer, compress_zero_demand,
+                                 solve_checkpointed, solve_intermittent, solve_into, trace_plan_into)
+from utils import calculate_cost_breakdown
+
+
+def test_order_table_survives_next_solve_on_shared_workspace():
+    optimizer = VectorizedInventoryOptimizer(SolverWorkspace())
+    first = optimizer.calculate_min_cost(3, [10, 0, 10], 20, 20, 1, 30, 1)
+    saved = np.array(first)
+    optimizer.calculate_min_cost(3, [5, 5, 5], 20, 20, 2, 5, 3)
+    assert np.array_equal(first, saved)
+    assert optimizer.calculate_optimal_sol(3, first, [10, 0, 10])[0][1] == 20
+
+
+def _full_dp_cost(demand, max_order, max_storage, production_cost, setup_cost, holding_cost):
+    workspace = SolverWorkspace()
+    return solve_into(workspace, len(demand), demand, max_order, max_storage, production_cost, setup_cost,
+                      holding_cost)
+
+
+def _intermittent_cost(demand, max_order, max_storage, production_cost, setup_cost, holding_cost):
+    try:
+        optimal_sol = solve_intermittent(len(demand), demand, max_order, max_storage, production_cost, setup_cost,
+                                         holding_cost, SolverWorkspace())
+    except ValueError:
+        return math.inf
+    inventory = 0
+    for (_, ordered), period_demand in zip(optimal_sol, demand):
+        inventory += ordered - period_demand
+        assert 0 <= ordered <= max_order and 0 <= inventory <= max_storage
+    return calculate_cost_breakdown(optimal_sol, demand, production_cost, setup_cost, holding_cost)['total']
+
+
+def test_compress_zero_demand_keeps_only_ordering_months():
+    assert compress_zero_demand([0, 0, 5, 0, 0, 5], 10, 10) == ([0, 2, 5], [2, 3, 1])
+    # 10 units with max_order 4 need 6 prebuilt, so the last two zero months may order
+    assert compress_zero_demand([0, 0, 0, 0, 10], 4, 8) == ([0, 2, 3, 4], [2, 1, 1, 1])
+    assert compress_zero_demand([5, 0, 0], 1, 5) == ([0], [3])
+
+
+def test_capacity_bound_intermittent_series_scales_with_demand_days():
+    # 150 units every 30 days with max_order 100: each gap keeps one ordering day to prebuild
+    demand = [150 if t % 30 == 15 else 0 for t in range(365)]
+    periods, holding_weights = compress_zero_demand(demand, 100, 100)
+    demand_days = sum(1 for d in demand if d > 0)
+    assert len(periods) == 2 * demand_days + 1
+    assert sum(holding_weights) == len(demand)
+    assert _intermittent_cost(demand, 100, 100, 1, 50, 0.1) == pytest.approx(_full_dp_cost(demand, 100, 100, 1, 50, 0.1))
+
+
+@pytest.mark.parametrize('demand, max_order, max_storage, costs', [
+    ([0, 0, 0, 0, 10], 4, 8, (1, 30, 0.5)),   # feasible only by ordering inside the leading run
+    ([4, 4, 0, 10], 8, 10, (1, 5, 3)),        # cheapest plan orders in the zero month
+])
+def test_intermittent_matches_full_dp_when_capacity_binds(demand, max_order, max_storage, costs):
+    assert _intermittent_cost(demand, max_order, max_storage, *costs) == \
+        pytest.approx(_full_dp_cost(demand, max_order, max_storage, *costs))
+
+
+def test_intermittent_matches_full_dp_on_random_instances():
+    rng = random.Random(31)
+    for _ in range(1500):
+        demand = [rng.choice([0, 0, 0, rng.randint(1, 30)]) for _ in range(rng.randint(1, 14))]
+        costs = (rng.choice([0, 1, 2]), rng.choice([0, 5, 30]), rng.choice([0, 0.5, 1, 3]))
+        max_order, max_storage = rng.randint(1, 25), rng.randint(1, 40)
+        expected = _full_dp_cost(demand, max_order, max_storage, *costs)
+        assert _intermittent_cost(demand, max_order, max_storage, *costs) == pytest.approx(expected), demand
+
+
+@pytest.mark.parametrize('interval', [None, 1, 2, 3, 7, 12, 40])
+def test_checkpointed_matches_full_dp(interval):
+    rng = random.Random(29)
+    for _ in range(40):
+        n = 12
+        demand = [rng.randint(0, 20) for _ in range(n)]
+        args = (n, demand, 25, 40, rng.choice([1, 2]), rng.choice([5, 30]), rng.choice([0.5, 1]))
+        workspace = SolverWorkspace()
+        expected_cost = solve_into(workspace, *args)
+        if math.isinf(expected_cost):
+            continue
+        expected_orders = [int(ordered) for ordered in trace_plan_into(workspace, n, demand)]
+        optimal_sol, total_cost = solve_checkpointed(*args, checkpoint_interval=interval, workspace=SolverWorkspace())
+        assert total_cost == pytest.approx(expected_cost)
+        assert [ordered for _, ordered in optimal_sol] == expected_orders
+
+
+def test_checkpointed_infeasible_raises():
+    with pytest.raises(ValueError):
+        solve_checkpointed(3, [10, 50, 10], 20, 10, 1, 5, 1, checkpoint_interval=2)
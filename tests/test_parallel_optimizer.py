@@ -0,0 +1,24 @@
+import pytest
+
+from inventory_optimizer import SolverWorkspace, solve_into
+from parallel_optimizer import ParallelInventoryOptimizer
+from utils import calculate_cost_breakdown
+
+
+def test_matches_full_dp_across_chunks():
+    demand = [30, 0, 45, 10, 60, 5, 0, 0, 90]
+    args = (len(demand), demand, 80, 150, 2, 40, 0.5)
+    expected = solve_into(SolverWorkspace(), *args)
+    with ParallelInventoryOptimizer(threads=3, min_chunk=16) as optimizer:
+        optimal_order = optimizer.calculate_min_cost(*args)
+        optimizer.calculate_min_cost(len(demand), [1] * len(demand), 5, 10, 1, 1, 1)
+        optimal_sol = optimizer.calculate_optimal_sol(len(demand), optimal_order, demand)
+        assert calculate_cost_breakdown(optimal_sol, demand, 2, 40, 0.5)['total'] == pytest.approx(expected)
+        assert optimizer.solve(*args) == pytest.approx(expected)
+    assert optimizer.executor is None
+
+
+def test_infeasible_input_raises_presolve_diagnostic():
+    with ParallelInventoryOptimizer(threads=2) as optimizer:
+        with pytest.raises(ValueError, match="month 1"):
+            optimizer.solve(2, [1000, 100], 10, 10 ** 11, 1, 10, 1)
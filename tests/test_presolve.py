@@ -0,0 +1,96 @@
+import math
+import random
+import re
+
+import pytest
+
+from anytime_solver import AnytimeSolver
+from inventory_optimizer import (SolverWorkspace, VectorizedInventoryOptimizer, solve_checkpointed, solve_intermittent,
+                                 solve_into)
+from presolve import presolve, solve_presolved
+from utils import calculate_cost_breakdown
+
+
+def _random_instance(rng):
+    demand = [rng.choice([0, 0, rng.randint(1, 25)]) for _ in range(rng.randint(1, 10))]
+    if sum(demand) == 0:
+        demand[-1] = 4
+    costs = (rng.choice([1, 2]), rng.choice([0, 5, 30]), rng.choice([0.5, 1, 2]))
+    return demand, rng.randint(1, 40), rng.randint(1, 40), costs
+
+
+def _full_dp_cost(demand, max_order, max_storage, costs):
+    return solve_into(SolverWorkspace(), len(demand), demand, max_order, max_storage, *costs)
+
+
+def _failing_month(diagnostic):
+    return int(re.search(r'[Mm]onths? (?:\d+-)?(\d+)', diagnostic).group(1))
+
+
+def test_matches_full_dp_on_random_instances():
+    rng = random.Random(34)
+    for _ in range(1500):
+        demand, max_order, max_storage, costs = _random_instance(rng)
+        expected = _full_dp_cost(demand, max_order, max_storage, costs)
+        problem = presolve(len(demand), demand, max_order, max_storage)
+        assert problem.feasible == (not math.isinf(expected)), (demand, max_order, max_storage)
+        if not problem.feasible:
+            # The diagnostic names the first month t such that months 1..t alone cannot be supplied
+            month = _failing_month(problem.diagnostic)
+            assert math.isinf(_full_dp_cost(demand[:month], max_order, max_storage, costs))
+            assert month == 1 or not math.isinf(_full_dp_cost(demand[:month - 1], max_order, max_storage, costs))
+            continue
+
+        optimal_sol, cost = solve_presolved(problem, *costs)
+        assert cost == pytest.approx(expected)
+        assert calculate_cost_breakdown(optimal_sol, demand, *costs)['total'] == pytest.approx(expected)
+        inventory = 0
+        for (_, ordered), period_demand in zip(optimal_sol, demand):
+            inventory += ordered - period_demand
+            assert 0 <= ordered <= max_order and 0 <= inventory <= max_storage
+        for t, ordered in problem.fixed_orders.items():
+            assert optimal_sol[t][1] == ordered
+        for t in problem.forced_setups:
+            assert optimal_sol[t][1] > 0
+
+
+def test_diagnostic_names_earliest_month():
+    problem = presolve(4, [1000, 1000, 1000, 1000], 80, 50)
+    assert not problem.feasible
+    assert problem.diagnostic.startswith("Demand through month 1 ")
+    with pytest.raises(ValueError):
+        solve_presolved(problem, 1, 1, 1)
+
+
+def test_anytime_solver_converges_to_full_dp():
+    rng = random.Random(27)
+    for _ in range(300):
+        demand, max_order, max_storage, costs = _random_instance(rng)
+        expected = _full_dp_cost(demand, max_order, max_storage, costs)
+        solver = AnytimeSolver(len(demand), demand, max_order, max_storage, *costs)
+        result = solver.result()
+        while not result['optimal']:
+            result = solver.solve(0)
+            assert result['lower_bound'] <= expected + 1e-9
+        if math.isinf(expected):
+            assert result['optimal_sol'] is None and result['diagnostic']
+        else:
+            assert result['cost'] == pytest.approx(expected)
+
+
+def test_infeasible_with_huge_storage_reports_without_allocating():
+    solver = AnytimeSolver(2, [1000, 100], 10, 10 ** 11, 1, 10, 1)
+    result = solver.solve(1.0)
+    assert result['optimal_sol'] is None and result['optimal']
+    assert result['diagnostic'].startswith("Demand through month 1 ")
+    assert len(solver.cost_to_go) == 1
+
+
+@pytest.mark.parametrize('solve', [
+    lambda *args: solve_intermittent(*args),
+    lambda *args: solve_checkpointed(*args),
+    lambda *args: VectorizedInventoryOptimizer().calculate_min_cost(*args),
+])
+def test_engines_raise_presolve_diagnostic(solve):
+    with pytest.raises(ValueError, match="No feasible plan: Demand through month 1 "):
+        solve(2, [1000, 100], 10, 10 ** 11, 1, 10, 1)
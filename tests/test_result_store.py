@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from result_store import SKU_WIDTH, ResultStore
+
+
+def _row(sku):
+    return (sku, [5, 0], [2, 0], [52.0, 0.0], {'production': 50.0, 'setup': 0.0, 'holding': 2.0, 'total': 52.0})
+
+
+def test_append_and_read_back(tmp_path):
+    store = ResultStore(str(tmp_path))
+    store.append_batch([_row('A'), _row('é' * 32)])
+    assert len(store) == 2
+    assert store.plan(1)['sku'] == 'é' * 32
+    assert list(store.plan(0)['order']) == [5, 0]
+    assert [row['SKU'] for row in store.page(0, 10)] == ['A', 'é' * 32]
+
+
+def test_sku_longer_than_column_is_rejected(tmp_path):
+    store = ResultStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.append_batch([_row('a' + 'é' * 40)])
+    with pytest.raises(ValueError):
+        store.append_batch([_row('x' * (SKU_WIDTH + 1))])
+    assert len(store) == 0
+
+
+def test_read_only_open_does_not_write(tmp_path):
+    with pytest.raises(ValueError):
+        ResultStore(str(tmp_path), read_only=True)
+    assert os.listdir(str(tmp_path)) == []
+
+    ResultStore(str(tmp_path)).append_batch([_row('A')])
+    store = ResultStore(str(tmp_path), read_only=True)
+    assert store.plan(0)['sku'] == 'A'
+    with pytest.raises(ValueError):
+        store.append_batch([_row('B')])
@@ -0,0 +1,61 @@
+import random
+
+import numpy as np
+import pytest
+
+from stochastic_optimizer import FFT_THRESHOLD, StochasticInventoryOptimizer, forecast_pmfs
+
+
+def _reference_stage(next_cost, pmf, max_storage, holding_cost, shortage_cost):
+    """G(y) by direct summation over every demand outcome"""
+    stage = []
+    for y in range(max_storage + 1):
+        expected = 0.0
+        for d, probability in enumerate(pmf):
+            left = max(0, y - d)
+            expected += probability * (holding_cost * left + shortage_cost * max(0, d - y) + next_cost[left])
+        stage.append(expected)
+    return stage
+
+
+def _reference_costs(pmfs, max_order, max_storage, production_cost, setup_cost, holding_cost, shortage_cost,
+                     policy=None):
+    """Optimal expected cost per starting stock, or the cost of following policy when given"""
+    cost_to_go = [0.0] * (max_storage + 1)
+    for t in range(len(pmfs) - 1, -1, -1):
+        stage = _reference_stage(cost_to_go, pmfs[t], max_storage, holding_cost, shortage_cost)
+        costs = []
+        for x in range(max_storage + 1):
+            options = {x: stage[x]}
+            for y in range(x + 1, min(x + max_order, max_storage) + 1):
+                options[y] = setup_cost + production_cost * (y - x) + stage[y]
+            costs.append(options[policy[t][x]] if policy is not None else min(options.values()))
+        cost_to_go = costs
+    return cost_to_go
+
+
+@pytest.mark.parametrize('forecast, error_std, max_order, max_storage', [
+    ([8, 0, 12, 5], 3.0, 10, 25),
+    ([20, 35, 10], [4.0, 20.0, 2.0], 30, 80),   # month 2 support exceeds FFT_THRESHOLD
+])
+def test_policy_matches_reference_dp(forecast, error_std, max_order, max_storage):
+    pmfs = forecast_pmfs(forecast, error_std)
+    args = (max_order, max_storage, 2.0, 15.0, 0.5, 9.0)
+    order_up_to, expected_cost = StochasticInventoryOptimizer().calculate_policy(len(pmfs), pmfs, *args)
+
+    reference = _reference_costs(pmfs, *args)
+    assert expected_cost == pytest.approx(reference[0])
+    # Ties may pick a different level, but following the policy must be exactly as good
+    assert _reference_costs(pmfs, *args, policy=order_up_to) == pytest.approx(reference)
+    if not isinstance(error_std, float):
+        assert max(len(pmf) for pmf in pmfs) > FFT_THRESHOLD
+
+
+def test_deterministic_demand_needs_no_shortage():
+    rng = random.Random(33)
+    demand = [rng.randint(0, 6) for _ in range(5)]
+    pmfs = forecast_pmfs(demand, 0.0)
+    order_up_to, expected_cost = StochasticInventoryOptimizer().calculate_policy(len(pmfs), pmfs, 10, 15, 1.0, 4.0,
+                                                                                 0.5, 100.0)
+    assert expected_cost == pytest.approx(_reference_costs(pmfs, 10, 15, 1.0, 4.0, 0.5, 100.0)[0])
+    assert np.all(order_up_to[:, 0] >= np.array(demand))
@@ -72,8 +72,10 @@ def validate_inputs(n, demand, max_order, max_storage, production_cost, setup_co
     if n <= 0:
         errors.append("Number of months must be greater than 0")
     
-    if not all(d > 0 for d in demand):
-        errors.append("All demand values must be greater than 0")
+    if not all(d >= 0 for d in demand):
+        errors.append("Demand values cannot be negative")
+    elif sum(demand) <= 0:
+        errors.append("At least one month must have demand greater than 0")
     
     if max_order <= 0:
         errors.append("Maximum order capacity must be greater than 0")